@@ -5,6 +5,7 @@ import json
 import os
 import sys
 import textwrap
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
@@ -17,12 +18,14 @@ from runllm.models import RunOptions
 from runllm.onboarding import cmd_onboard
 from runllm.parser import parse_rllm_file
 from runllm.stats import StatsStore
+from runllm.utils import YAMLLoader
 
 
 class _HelpFormatter(argparse.ArgumentDefaultsHelpFormatter, argparse.RawDescriptionHelpFormatter):
     pass
 
 
+@lru_cache(maxsize=None)
 def _help_topics_text() -> dict[str, str]:
     return {
         "rllm": textwrap.dedent(
@@ -162,6 +165,7 @@ def _help_topics_text() -> dict[str, str]:
     }
 
 
+@lru_cache(maxsize=None)
 def _help_topics_json() -> dict[str, Any]:
     return {
         "rllm": {
@@ -256,7 +260,7 @@ def _load_input(args: argparse.Namespace) -> dict[str, Any]:
         p = Path(args.input_file)
         text = p.read_text(encoding="utf-8")
         if p.suffix.lower() in {".yaml", ".yml"}:
-            data = yaml.safe_load(text)
+            data = yaml.load(text, Loader=YAMLLoader)
         else:
             data = json.loads(text)
         if not isinstance(data, dict):
@@ -2,12 +2,15 @@ from __future__ import annotations
 
 import os
 import hashlib
+import threading
 from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
 
 import yaml
 
+from runllm.utils import YAMLLoader
+
 
 @dataclass
 class RuntimeConfig:
@@ -20,6 +23,7 @@ class RuntimeConfig:
 _RUNTIME_CONFIG: RuntimeConfig | None = None
 _RUNTIME_CONFIG_KEY: tuple[Any, ...] | None = None
 _AUTOLOADED_ENV_VALUES: dict[str, str] = {}
+_RUNTIME_CONFIG_LOCK = threading.Lock()
 
 
 def _file_signature(path: Path) -> tuple[int, str] | None:
@@ -76,7 +80,7 @@ def _parse_env_file(path: Path) -> dict[str, str]:
 def _parse_config_yaml(path: Path) -> tuple[RuntimeConfig, dict[str, str]]:
     if not path.exists():
         return RuntimeConfig(), {}
-    raw = yaml.safe_load(path.read_text(encoding="utf-8")) or {}
+    raw = yaml.load(path.read_text(encoding="utf-8"), Loader=YAMLLoader) or {}
     if not isinstance(raw, dict):
         return RuntimeConfig(), {}
 
@@ -105,6 +109,13 @@ def _parse_config_yaml(path: Path) -> tuple[RuntimeConfig, dict[str, str]]:
 
 
 def load_runtime_config(*, autoload: bool = True) -> RuntimeConfig:
+    # run_program may be called from several threads (e.g. onboarding steps); the reload
+    # rewrites os.environ, so only one thread may do it at a time.
+    with _RUNTIME_CONFIG_LOCK:
+        return _load_runtime_config(autoload=autoload)
+
+
+def _load_runtime_config(*, autoload: bool) -> RuntimeConfig:
     global _RUNTIME_CONFIG, _RUNTIME_CONFIG_KEY, _AUTOLOADED_ENV_VALUES
     cache_key = _cache_key(autoload=autoload)
     if not autoload and _RUNTIME_CONFIG is not None and _RUNTIME_CONFIG_KEY == cache_key:
@@ -141,6 +152,9 @@ def load_runtime_config(*, autoload: bool = True) -> RuntimeConfig:
             protected_existing[key] = value
 
     for key, injected_value in list(_AUTOLOADED_ENV_VALUES.items()):
+        if key in merged_env:
+            # Overwritten below; deleting first would briefly hide the key from other threads.
+            continue
         if os.environ.get(key) == injected_value and key not in protected_existing:
             del os.environ[key]
 
@@ -9,7 +9,7 @@ from typing import Any
 from runllm.config import get_runtime_config, load_runtime_config, required_provider_key
 from runllm.errors import RunLLMError, make_error
 from runllm.models import RLLMProgram, RunOptions, UsageMetrics
-from runllm.ollama import ensure_ollama_model
+from runllm.ollama import ensure_ollama_model, ensure_ollama_models
 from runllm.parser import parse_rllm_file
 from runllm.pyblocks import execute_python_block
 from runllm.stats import StatsStore
@@ -82,6 +82,28 @@ def _prepare_model(program: RLLMProgram, options: RunOptions) -> str:
     return model
 
 
+def _ollama_models_in_tree(program: RLLMProgram, options: RunOptions) -> list[str]:
+    models: list[str] = []
+    seen: set[str] = set()
+    pending = [program]
+    for current in pending:
+        if str(current.path) in seen:
+            continue
+        seen.add(str(current.path))
+        model = options.model_override or str(current.llm.get("model", "")).strip()
+        if model.startswith("ollama/"):
+            models.append(model.split("/", 1)[1])
+        for dep in current.uses:
+            if str(dep.path) in seen:
+                continue
+            try:
+                pending.append(parse_rllm_file(dep.path))
+            except RunLLMError:
+                # Reported with full context when the dependency actually runs.
+                continue
+    return list(dict.fromkeys(models))
+
+
 def _ensure_provider_credentials(model: str) -> None:
     required = required_provider_key(model)
     if required is None:
@@ -197,6 +219,12 @@ def _run_single(
 
     validate_json_schema_instance(instance=input_payload, schema=program.input_schema, phase="input")
 
+    if not stack and program.uses:
+        ollama_models = _ollama_models_in_tree(program, options)
+        if len(ollama_models) > 1:
+            # One listing and concurrent pulls for the whole uses tree; each app still checks its own model.
+            ensure_ollama_models(ollama_models, auto_pull=options.ollama_auto_pull)
+
     dep_outputs = _execute_uses(
         program,
         input_payload,
@@ -5,14 +5,14 @@ from pathlib import Path
 from typing import Any
 
 
-@dataclass
+@dataclass(slots=True)
 class UseSpec:
     name: str
     path: Path
     with_map: dict[str, Any] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class RLLMProgram:
     path: Path
     name: str
@@ -34,7 +34,7 @@ class RLLMProgram:
     python_post: str | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class RunOptions:
     model_override: str | None = None
     max_retries: int = 2
@@ -44,7 +44,7 @@ class RunOptions:
     python_memory_limit_mb: int = 256
 
 
-@dataclass
+@dataclass(slots=True)
 class UsageMetrics:
     latency_ms: float
     prompt_tokens: int
@@ -1,19 +1,232 @@
 from __future__ import annotations
 
+import json
+import os
+import re
+import shutil
 import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Literal
 
 from runllm.errors import make_error
 
 
-def _run_ollama(command: list[str]) -> subprocess.CompletedProcess[str]:
-    return subprocess.run(command, check=False, capture_output=True, text=True)
+DEFAULT_OLLAMA_API_BASE = "http://localhost:11434"
+_HTTP_TIMEOUT_SECONDS = 2.0
+_PULL_TIMEOUT_SECONDS = 300.0
+_MODEL_CACHE_TTL_SECONDS = 5.0
+_DEFAULT_PULL_PARALLELISM = 2
+_STDERR_TAIL_BYTES = 4096
+# First column of each `ollama list` row, minus the "NAME  ID  SIZE  MODIFIED" header.
+_MODEL_NAME_RE = re.compile(rb"^(?!NAME\s)(\S+)", re.MULTILINE)
 
+_MISSING_MODEL_ERROR = {
+    "error_code": "RLLM_010",
+    "error_type": "OllamaModelMissingError",
+    "doc_ref": "docs/errors.md#RLLM_010",
+}
 
-def ollama_has_model(model: str) -> bool:
+_MODEL_CACHE: tuple[float, frozenset[str]] | None = None
+_SHOWN_MODELS: dict[str, float] = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def _ollama_api_base() -> str:
+    return (os.environ.get("OLLAMA_API_BASE") or DEFAULT_OLLAMA_API_BASE).rstrip("/")
+
+
+@lru_cache(maxsize=1)
+def _ollama_binary() -> str | None:
+    return shutil.which("ollama")
+
+
+def _pull_parallelism() -> int:
+    try:
+        return max(1, int(os.environ.get("OLLAMA_NUM_PARALLEL", _DEFAULT_PULL_PARALLELISM)))
+    except ValueError:
+        return _DEFAULT_PULL_PARALLELISM
+
+
+def _run_ollama(
+    command: list[str], capture: Literal["all", "stderr"] = "all"
+) -> subprocess.CompletedProcess[bytes]:
+    binary = _ollama_binary()
+    if binary is None:
+        # Fail fast like a shell would (exit 127) instead of raising FileNotFoundError.
+        return subprocess.CompletedProcess(command, 127, b"", b"ollama executable not found on PATH")
+    if capture == "all":
+        return subprocess.run([binary, *command[1:]], check=False, capture_output=True)
+    # Drain stderr as it arrives, keeping only the tail, so the child never blocks on a full pipe.
+    tail = bytearray()
+    with subprocess.Popen([binary, *command[1:]], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as proc:
+        assert proc.stderr is not None
+        for chunk in iter(lambda: proc.stderr.read1(65536), b""):
+            tail += chunk
+            del tail[:-_STDERR_TAIL_BYTES]
+        returncode = proc.wait()
+    return subprocess.CompletedProcess(command, returncode, b"", bytes(tail))
+
+
+def _list_models_http() -> set[str] | None:
+    try:
+        with urllib.request.urlopen(f"{_ollama_api_base()}/api/tags", timeout=_HTTP_TIMEOUT_SECONDS) as resp:
+            data = json.loads(resp.read())
+    except (OSError, ValueError):
+        return None
+    models = data.get("models") if isinstance(data, dict) else None
+    if not isinstance(models, list):
+        return None
+    return {str(item["name"]) for item in models if isinstance(item, dict) and item.get("name")}
+
+
+def _with_default_tag(model: str) -> str:
+    # Ollama stores untagged models as "<name>:latest"; the registry host may itself contain a port.
+    if ":" in model.rsplit("/", 1)[-1]:
+        return model
+    return f"{model}:latest"
+
+
+def _parse_model_list(stdout: bytes) -> set[str]:
+    return {match.group(1).decode("utf-8", errors="replace") for match in _MODEL_NAME_RE.finditer(stdout)}
+
+
+def _list_models_cli() -> set[str] | None:
     proc = _run_ollama(["ollama", "list"])
     if proc.returncode != 0:
-        return False
-    return any(line.split()[0] == model for line in proc.stdout.splitlines() if line.strip())
+        return None
+    return _parse_model_list(proc.stdout)
+
+
+def _installed_models() -> frozenset[str]:
+    global _MODEL_CACHE
+    with _MODEL_CACHE_LOCK:
+        cached = _MODEL_CACHE
+        if cached is not None and time.monotonic() - cached[0] < _MODEL_CACHE_TTL_SECONDS:
+            return cached[1]
+        names = _list_models_http()
+        if names is None:
+            names = _list_models_cli()
+        if names is None:
+            return cached[1] if cached is not None else frozenset()
+        _MODEL_CACHE = (time.monotonic(), frozenset(_with_default_tag(name) for name in names))
+        return _MODEL_CACHE[1]
+
+
+def _missing_models(models: Iterable[str]) -> list[str]:
+    installed = _installed_models()
+    return [model for model in dict.fromkeys(models) if _with_default_tag(model) not in installed]
+
+
+def _invalidate_model_cache() -> None:
+    global _MODEL_CACHE
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE = None
+        _SHOWN_MODELS.clear()
+
+
+def _known_present(model: str) -> bool:
+    now = time.monotonic()
+    with _MODEL_CACHE_LOCK:
+        cached = _MODEL_CACHE
+        if cached is not None and now - cached[0] < _MODEL_CACHE_TTL_SECONDS and model in cached[1]:
+            return True
+        shown_at = _SHOWN_MODELS.get(model)
+        return shown_at is not None and now - shown_at < _MODEL_CACHE_TTL_SECONDS
+
+
+def _show_model_http(model: str) -> bool | None:
+    try:
+        request = urllib.request.Request(
+            f"{_ollama_api_base()}/api/show",
+            data=json.dumps({"name": model}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=_HTTP_TIMEOUT_SECONDS):
+            return True
+    except urllib.error.HTTPError as exc:
+        return False if exc.code == 404 else None
+    except (OSError, ValueError):
+        return None
+
+
+def ollama_has_model(model: str) -> bool:
+    name = _with_default_tag(model)
+    if _known_present(name):
+        return True
+    found = _show_model_http(name)
+    if found:
+        with _MODEL_CACHE_LOCK:
+            _SHOWN_MODELS[name] = time.monotonic()
+    if found is not None:
+        return found
+    return name in _installed_models()
+
+
+def _pull_model_http(model: str) -> str | None:
+    try:
+        request = urllib.request.Request(
+            f"{_ollama_api_base()}/api/pull",
+            data=json.dumps({"name": model, "stream": True}).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        resp = urllib.request.urlopen(request, timeout=_PULL_TIMEOUT_SECONDS)
+    except urllib.error.HTTPError as exc:
+        return exc.read().decode("utf-8", errors="replace").strip() or str(exc)
+    except (OSError, ValueError):
+        return None
+    status = ""
+    try:
+        with resp:
+            for raw_line in resp:
+                if not raw_line.strip():
+                    continue
+                try:
+                    event = json.loads(raw_line)
+                except ValueError:
+                    continue
+                if not isinstance(event, dict):
+                    continue
+                if event.get("error"):
+                    return str(event["error"])
+                status = str(event.get("status") or status)
+    except OSError as exc:
+        return f"pull stream interrupted: {exc}"
+    if status != "success":
+        return f"pull finished with status: {status or 'unknown'}"
+    return ""
+
+
+def _pull_model_cli(model: str) -> str:
+    proc = _run_ollama(["ollama", "pull", model], capture="stderr")
+    if proc.returncode == 0:
+        return ""
+    lines = proc.stderr.decode("utf-8", errors="replace").split("\n")
+    kept = [line.strip() for line in lines if "\r" not in line and line.strip()]
+    if not kept:
+        kept = [line.rpartition("\r")[2].strip() for line in lines if line.strip()][-1:]
+    return "\n".join(kept) or f"ollama pull exited with {proc.returncode}"
+
+
+def _pull_model(model: str) -> None:
+    failure = _pull_model_http(model)
+    if failure is None:
+        failure = _pull_model_cli(model)
+    if not failure:
+        return
+    raise make_error(
+        **_MISSING_MODEL_ERROR,
+        message="Failed to pull Ollama model.",
+        details={"model": model, "stderr": failure},
+        recovery_hint="Verify model name and local resources, then retry.",
+    )
 
 
 def ensure_ollama_model(model: str, auto_pull: bool) -> None:
@@ -21,21 +234,36 @@ def ensure_ollama_model(model: str, auto_pull: bool) -> None:
         return
     if not auto_pull:
         raise make_error(
-            error_code="RLLM_010",
-            error_type="OllamaModelMissingError",
+            **_MISSING_MODEL_ERROR,
             message="Required Ollama model is not available locally.",
             details={"model": model},
             recovery_hint="Run with --ollama-auto-pull or execute: ollama pull <model>",
-            doc_ref="docs/errors.md#RLLM_010",
         )
 
-    proc = _run_ollama(["ollama", "pull", model])
-    if proc.returncode != 0:
+    _pull_model(model)
+    _invalidate_model_cache()
+
+
+def ensure_ollama_models(models: Iterable[str], auto_pull: bool) -> None:
+    missing = _missing_models(models)
+    if not missing:
+        return
+    if not auto_pull:
         raise make_error(
-            error_code="RLLM_010",
-            error_type="OllamaModelMissingError",
-            message="Failed to pull Ollama model.",
-            details={"model": model, "stderr": proc.stderr.strip()},
-            recovery_hint="Verify model name and local resources, then retry.",
-            doc_ref="docs/errors.md#RLLM_010",
+            **_MISSING_MODEL_ERROR,
+            message="Required Ollama models are not available locally.",
+            details={"models": missing},
+            recovery_hint="Run with --ollama-auto-pull or execute: ollama pull <model>",
         )
+
+    try:
+        with ThreadPoolExecutor(max_workers=min(_pull_parallelism(), len(missing))) as pool:
+            # Consume results in request order so the first failing model is the one reported.
+            for _ in pool.map(_pull_model, missing):
+                pass
+    finally:
+        _invalidate_model_cache()
+
+
+def reset_ollama_model_cache_for_tests() -> None:
+    _invalidate_model_cache()
@@ -3,18 +3,24 @@ from __future__ import annotations
 import getpass
 import json
 import os
+import re
 import shlex
 import sys
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
+import yaml
+
 from runllm.config import required_provider_key
 from runllm.errors import RunLLMError, make_error
 from runllm.executor import run_program
 from runllm.models import RunOptions
 from runllm.parser import parse_rllm_file
+from runllm.utils import YAMLDumper
 
 
 PROVIDER_DEFAULT_MODEL: dict[str, str] = {
@@ -26,6 +32,12 @@ PROVIDER_DEFAULT_MODEL: dict[str, str] = {
     "ollama": "ollama/llama3.1:8b",
 }
 
+# Runs of anything but letters/digits (underscores included) collapse to a single "_".
+_NAME_SEPARATOR_RE = re.compile(r"[\W_]+")
+_WORD_RE = re.compile(r"\w+")
+
+_PACKAGED_ONBOARDING_DIR = Path(__file__).resolve().parents[1] / "examples" / "onboarding"
+
 DEFAULT_SESSION_PATH = Path(".runllm") / "onboarding-session.json"
 DEFAULT_SCAFFOLD_PATH = Path(".runllm") / "scaffold-profile.json"
 
@@ -480,10 +492,7 @@ Return ONLY JSON object with keys checklist and troubleshooting.
 
 
 def _normalize_name(value: str) -> str:
-    cleaned = "".join(ch if ch.isalnum() or ch == "_" else "_" for ch in value.strip().lower())
-    while "__" in cleaned:
-        cleaned = cleaned.replace("__", "_")
-    cleaned = cleaned.strip("_")
+    cleaned = _NAME_SEPARATOR_RE.sub("_", value.strip().lower()).strip("_")
     return cleaned or "first_app"
 
 
@@ -539,8 +548,7 @@ def _provider_for_model(model: str) -> str:
     return "custom"
 
 
-def _detect_credential(model: str) -> tuple[bool, str | None]:
-    required = required_provider_key(model)
+def _detect_credential(required: tuple[str, str] | None) -> tuple[bool, str | None]:
     if required is None:
         return True, None
     _provider, key_name = required
@@ -549,9 +557,16 @@ def _detect_credential(model: str) -> tuple[bool, str | None]:
 
 def _upsert_env_file(path: Path, key: str, value: str) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    lines: list[str] = []
-    if path.exists():
-        lines = path.read_text(encoding="utf-8").splitlines()
+    entry = f'{key}="{value}"\n'
+    if not path.exists():
+        path.write_text(entry, encoding="utf-8")
+        return
+    data = path.read_text(encoding="utf-8")
+    if re.search(rf"^[ \t]*{re.escape(key)}=", data, re.MULTILINE) is None:
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write(entry if not data or data.endswith("\n") else f"\n{entry}")
+        return
+    lines = data.splitlines()
     replaced = False
     out: list[str] = []
     for line in lines:
@@ -642,10 +657,8 @@ def _scaffold_path(args: Any) -> Path:
 
 
 def _load_session(path: Path) -> dict[str, Any]:
-    if not path.exists():
-        return {}
     try:
-        data = json.loads(path.read_text(encoding="utf-8"))
+        data = json.loads(path.read_bytes())
     except Exception:
         return {}
     if not isinstance(data, dict):
@@ -653,20 +666,32 @@ def _load_session(path: Path) -> dict[str, Any]:
     return data
 
 
-def _save_session(path: Path, data: dict[str, Any]) -> None:
+def _write_json_file(path: Path, data: dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=True) + "\n", encoding="utf-8")
+    path.write_bytes(json.dumps(data, indent=2, ensure_ascii=True).encode("ascii") + b"\n")
+
+
+def _save_session(path: Path, data: dict[str, Any]) -> None:
+    _write_json_file(path, data)
 
 
 def _save_scaffold(path: Path, data: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, indent=2, ensure_ascii=True) + "\n", encoding="utf-8")
+    _write_json_file(path, data)
+
+
+@lru_cache(maxsize=None)
+def _packaged_onboarding_app(name: str) -> Path | None:
+    packaged = _PACKAGED_ONBOARDING_DIR / f"{name}.rllm"
+    return packaged if packaged.exists() else None
 
 
 def _onboarding_app_path(name: str, temp_dir: Path) -> Path:
-    packaged = Path(__file__).resolve().parents[1] / "examples" / "onboarding" / f"{name}.rllm"
-    if packaged.exists():
-        return packaged.resolve()
+    packaged = _packaged_onboarding_app(name)
+    if packaged is not None:
+        return packaged
+    out = temp_dir / f"{name}.rllm"
+    if out.exists():
+        return out
     text = EMBEDDED_ONBOARDING_APPS.get(name)
     if not text:
         raise make_error(
@@ -677,7 +702,6 @@ def _onboarding_app_path(name: str, temp_dir: Path) -> Path:
             recovery_hint="Install a build with onboarding templates or run from repository root.",
             doc_ref="docs/errors.md#RLLM_011",
         )
-    out = temp_dir / f"{name}.rllm"
     out.write_text(text, encoding="utf-8")
     return out
 
@@ -692,9 +716,18 @@ def _schema_for_keys(keys: list[str]) -> dict[str, Any]:
 
 
 def _sanitize_schema_from_builder(builder_output: dict[str, Any], fallback_keys: list[str]) -> dict[str, Any]:
-    fallback = [_normalize_name(k) for k in fallback_keys if _normalize_name(k)]
-    fallback_set = set(fallback)
+    fallback = [_normalize_name(k) for k in fallback_keys]
     raw_properties = builder_output.get("properties", {})
+    required = builder_output.get("required", [])
+    if (
+        isinstance(raw_properties, dict)
+        and list(raw_properties) == fallback
+        and required == fallback
+        and all(value == {"type": "string"} for value in raw_properties.values())
+    ):
+        return _schema_for_keys(fallback)
+
+    fallback_set = set(fallback)
     properties: dict[str, dict[str, Any]] = {}
     if isinstance(raw_properties, dict):
         for key, value in raw_properties.items():
@@ -709,7 +742,6 @@ def _sanitize_schema_from_builder(builder_output: dict[str, Any], fallback_keys:
                     prop["type"] = "string"
                 properties[normalized_key] = prop
 
-    required = builder_output.get("required", [])
     required_keys: list[str] = []
     if isinstance(required, list):
         for item in required:
@@ -768,6 +800,9 @@ def _render_rllm_text(
         f"Return ONLY JSON object with keys: {prompt_keys}.\n"
         "No markdown, prose, or code blocks."
     )
+    llm_params: dict[str, Any] = {"temperature": temperature, "format": response_format}
+    if top_p is not None:
+        llm_params["top_p"] = top_p
     frontmatter = {
         "name": app_name,
         "description": description,
@@ -778,61 +813,15 @@ def _render_rllm_text(
         "input_schema": input_schema,
         "output_schema": output_schema,
         "llm": {"model": model},
-        "llm_params": {
-            "temperature": temperature,
-            "format": response_format,
-            **({"top_p": top_p} if top_p is not None else {}),
-        },
+        "llm_params": llm_params,
         "recommended_models": [model],
         "tags": ["onboarding-generated"],
         "metadata": {"starter_output_key": first_output},
     }
-    import yaml
-
-    yaml_text = yaml.safe_dump(frontmatter, sort_keys=False)
+    yaml_text = yaml.dump(frontmatter, Dumper=YAMLDumper, sort_keys=False)
     return f"---\n{yaml_text}---\n{prompt_body}\n\n<<<RECOVERY>>>\n{recovery}\n"
 
 
-def _render_connectivity_probe_app_text(model: str) -> str:
-    return f"""---
-name: onboarding_connectivity_probe
-description: Connectivity probe for onboarding.
-version: 0.1.0
-runllm_compat:
-  min: 0.1.0
-author: runllm
-max_context_window: 2000
-input_schema:
-  type: object
-  properties:
-    text:
-      type: string
-  required: [text]
-  additionalProperties: false
-output_schema:
-  type: object
-  properties:
-    ok:
-      type: boolean
-    message:
-      type: string
-  required: [ok, message]
-  additionalProperties: false
-llm:
-  model: {model}
-llm_params:
-  temperature: 0
-  format: json
----
-Return ONLY JSON object with keys ok and message.
-Set ok to true.
-Input: {{{{input.text}}}}
-
-<<<RECOVERY>>>
-Return ONLY JSON object with keys ok and message.
-"""
-
-
 def _replace_prompt_and_recovery(base_text: str, *, prompt_text: str, recovery_text: str) -> str:
     close_idx = base_text.find("\n---\n", 4)
     if close_idx == -1:
@@ -842,12 +831,10 @@ def _replace_prompt_and_recovery(base_text: str, *, prompt_text: str, recovery_t
 
 
 def _is_usable_prompt(draft: str, output_keys: list[str]) -> bool:
-    text = draft.strip().lower()
-    if not text:
-        return False
-    if "json" not in text:
+    tokens = set(_WORD_RE.findall(draft.lower()))
+    if "json" not in tokens:
         return False
-    return all(key.lower() in text for key in output_keys)
+    return all(key.lower() in tokens for key in output_keys)
 
 
 def run_onboarding(args: Any) -> dict[str, Any]:
@@ -864,12 +851,14 @@ def run_onboarding(args: Any) -> dict[str, Any]:
     priority = str(session_data.get("priority") or "quality")
 
     def persist(**updates: Any) -> None:
+        if all(key in session_data and session_data[key] == value for key, value in updates.items()):
+            return
         session_data.update(updates)
         _save_session(session_path, session_data)
 
     if args.model:
         model = args.model.strip()
-        preferred_provider = _provider_for_model(model)
+        provider_name = preferred_provider = _provider_for_model(model)
     else:
         preferred_provider = _prompt(
             "Choose provider (openai, anthropic, google, mistral, cohere, ollama)",
@@ -881,10 +870,10 @@ def run_onboarding(args: Any) -> dict[str, Any]:
         ).lower()
         model = PROVIDER_DEFAULT_MODEL.get(preferred_provider, PROVIDER_DEFAULT_MODEL["openai"])
         model = _prompt("Model to use", default=str(session_data.get("model") or model)).strip() or model
+        provider_name = _provider_for_model(model)
 
-    provider_name = _provider_for_model(model)
     persist(model=model, provider=provider_name, preferred_provider=preferred_provider, priority=priority)
-    has_cred, missing_key = _detect_credential(model)
+    has_cred, missing_key = _detect_credential(required_provider_key(model))
 
     credential_written = False
     credential_path: str | None = None
@@ -938,54 +927,58 @@ def run_onboarding(args: Any) -> dict[str, Any]:
                 print(f"Onboarding step '{name}' failed; using fallback.", file=sys.stderr)
                 return fallback
 
-        provider_plan = run_step(
-            "provider_select",
-            {"preferred_provider": preferred_provider, "priority": priority},
-            {"provider": provider_name, "model": model, "rationale": "Using selected model."},
-        )
+        user_name = os.environ.get("USER") or os.environ.get("USERNAME") or "runllm user"
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            provider_future = pool.submit(
+                run_step,
+                "provider_select",
+                {"preferred_provider": preferred_provider, "priority": priority},
+                {"provider": provider_name, "model": model, "rationale": "Using selected model."},
+            )
+            credential_future = None
+            if missing_key is not None:
+                credential_future = pool.submit(
+                    run_step,
+                    "credential_check",
+                    {
+                        "provider": provider_name,
+                        "model": model,
+                        "credential_present": bool(has_cred),
+                        "env_var_name": missing_key,
+                    },
+                    {
+                        "status": "present" if has_cred else "missing",
+                        "next_action": "Continue",
+                        "setup_steps": [
+                            f"Set {missing_key} in your environment and rerun onboarding."
+                            if not has_cred
+                            else f"{missing_key} is already available; continue onboarding."
+                        ],
+                    },
+                )
+            # hello_test doubles as the connectivity check, so unlike the other steps it has no
+            # fallback: an unreachable model or rejected credential stops onboarding here.
+            hello_future = pool.submit(
+                run_program,
+                _onboarding_app_path("hello_test", temp_dir),
+                {"user_name": user_name},
+                RunOptions(model_override=model, max_retries=1),
+                autoload_config=autoload_config,
+            )
+
+        provider_plan = provider_future.result()
         rationale = str(provider_plan.get("rationale") or "")
         if rationale:
             print(f"Provider guidance: {rationale}", file=sys.stderr)
 
         credential_guidance: dict[str, Any] = {}
-        if missing_key is not None:
-            credential_guidance = run_step(
-                "credential_check",
-                {
-                    "provider": provider_name,
-                    "model": model,
-                    "credential_present": bool(has_cred),
-                    "env_var_name": missing_key,
-                },
-                {
-                    "status": "present" if has_cred else "missing",
-                    "next_action": "Continue",
-                    "setup_steps": [
-                        f"Set {missing_key} in your environment and rerun onboarding."
-                        if not has_cred
-                        else f"{missing_key} is already available; continue onboarding."
-                    ],
-                },
-            )
+        if credential_future is not None:
+            credential_guidance = credential_future.result()
             next_action = str(credential_guidance.get("next_action") or "")
             if next_action:
                 print(f"Credential guidance: {next_action}", file=sys.stderr)
 
-        probe_path = Path(tmp_dir) / "connectivity_probe.rllm"
-        probe_path.write_text(_render_connectivity_probe_app_text(model), encoding="utf-8")
-        run_program(
-            probe_path,
-            {"text": "hello from runllm onboarding"},
-            RunOptions(model_override=model, max_retries=1),
-            autoload_config=autoload_config,
-        )
-
-        user_name = os.environ.get("USER") or os.environ.get("USERNAME") or "runllm user"
-        hello_step = run_step(
-            "hello_test",
-            {"user_name": user_name},
-            {"message": "Connectivity verified.", "ok": True},
-        )
+        hello_step = hello_future.result()
         hello_message = str(hello_step.get("message") or "")
         if hello_message:
             print(f"Hello check: {hello_message}", file=sys.stderr)
@@ -1090,27 +1083,6 @@ def run_onboarding(args: Any) -> dict[str, Any]:
             current_input_keys: list[str],
             current_output_keys: list[str],
         ) -> dict[str, Any]:
-            input_schema_step_inner = run_step(
-                "input_schema_builder",
-                {"purpose": current_purpose, "required_inputs": current_input_keys},
-                {
-                    "properties": {k: {"type": "string"} for k in current_input_keys},
-                    "required": current_input_keys,
-                    "notes": "fallback",
-                },
-            )
-            output_schema_step_inner = run_step(
-                "output_schema_builder",
-                {"purpose": current_purpose, "required_outputs": current_output_keys},
-                {
-                    "properties": {k: {"type": "string"} for k in current_output_keys},
-                    "required": current_output_keys,
-                    "notes": "fallback",
-                },
-            )
-            input_schema_inner = _sanitize_schema_from_builder(input_schema_step_inner, current_input_keys)
-            output_schema_inner = _sanitize_schema_from_builder(output_schema_step_inner, current_output_keys)
-
             fallback_prompt_inner = (
                 f"You are a focused micro-app for: {current_purpose}.\n"
                 f"Return ONLY JSON object with keys: {', '.join(current_output_keys)}.\n\n"
@@ -1122,16 +1094,43 @@ def run_onboarding(args: Any) -> dict[str, Any]:
                 f"Return ONLY JSON object with keys: {', '.join(current_output_keys)}.\n"
                 "No markdown, prose, or code blocks."
             )
-            prompt_step_inner = run_step(
-                "prompt_builder",
-                {"purpose": current_purpose, "output_keys": current_output_keys},
-                {"prompt": fallback_prompt_inner},
-            )
-            recovery_step_inner = run_step(
-                "recovery_builder",
-                {"output_keys": current_output_keys},
-                {"recovery_prompt": fallback_recovery_inner},
-            )
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                input_schema_future = pool.submit(
+                    run_step,
+                    "input_schema_builder",
+                    {"purpose": current_purpose, "required_inputs": current_input_keys},
+                    {
+                        "properties": {k: {"type": "string"} for k in current_input_keys},
+                        "required": current_input_keys,
+                        "notes": "fallback",
+                    },
+                )
+                output_schema_future = pool.submit(
+                    run_step,
+                    "output_schema_builder",
+                    {"purpose": current_purpose, "required_outputs": current_output_keys},
+                    {
+                        "properties": {k: {"type": "string"} for k in current_output_keys},
+                        "required": current_output_keys,
+                        "notes": "fallback",
+                    },
+                )
+                prompt_future = pool.submit(
+                    run_step,
+                    "prompt_builder",
+                    {"purpose": current_purpose, "output_keys": current_output_keys},
+                    {"prompt": fallback_prompt_inner},
+                )
+                recovery_future = pool.submit(
+                    run_step,
+                    "recovery_builder",
+                    {"output_keys": current_output_keys},
+                    {"recovery_prompt": fallback_recovery_inner},
+                )
+            input_schema_inner = _sanitize_schema_from_builder(input_schema_future.result(), current_input_keys)
+            output_schema_inner = _sanitize_schema_from_builder(output_schema_future.result(), current_output_keys)
+            prompt_step_inner = prompt_future.result()
+            recovery_step_inner = recovery_future.result()
             draft_prompt = str(prompt_step_inner.get("prompt") or "")
             draft_recovery = str(recovery_step_inner.get("recovery_prompt") or "")
             if not _is_usable_prompt(draft_prompt, current_output_keys):
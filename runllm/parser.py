@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import copy
+from functools import lru_cache
 from importlib.metadata import PackageNotFoundError, version as package_version
 from pathlib import Path
 import re
@@ -11,6 +13,7 @@ import yaml
 from runllm.errors import make_error
 from runllm.litellm_params import validate_litellm_params
 from runllm.models import RLLMProgram, UseSpec
+from runllm.utils import YAMLLoader
 
 
 REQUIRED_FIELDS = {
@@ -29,6 +32,12 @@ _SEMVER_PATTERN = re.compile(r"^(\d+)\.(\d+)\.(\d+)$")
 _PYPROJECT_VERSION_PATTERN = re.compile(r'^version\s*=\s*"([^"]+)"\s*$', re.MULTILINE)
 
 
+@lru_cache(maxsize=128)
+def _load_frontmatter(header_text: str) -> Any:
+    # The same apps (onboarding steps, shared `uses` children) are parsed many times per process.
+    return yaml.load(header_text, Loader=YAMLLoader)
+
+
 def _split_frontmatter(text: str) -> tuple[dict[str, Any], str]:
     if not text.startswith("---\n"):
         raise make_error(
@@ -52,7 +61,8 @@ def _split_frontmatter(text: str) -> tuple[dict[str, Any], str]:
     header_text = parts[0][4:]
     body = parts[1]
     try:
-        metadata = yaml.safe_load(header_text) or {}
+        # Callers own the returned metadata, so hand out a copy of the cached parse.
+        metadata = copy.deepcopy(_load_frontmatter(header_text)) or {}
     except yaml.YAMLError as exc:
         raise make_error(
             error_code="RLLM_001",
@@ -3,6 +3,13 @@ from __future__ import annotations
 import json
 from typing import Any
 
+try:
+    from yaml import CSafeDumper as YAMLDumper
+    from yaml import CSafeLoader as YAMLLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as YAMLDumper
+    from yaml import SafeLoader as YAMLLoader
+
 
 def estimate_tokens(text: str) -> int:
     # Conservative heuristic fallback.
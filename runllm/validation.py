@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+from functools import lru_cache
 from typing import Any
 
 import jsonschema
@@ -8,12 +9,30 @@ import jsonschema
 from runllm.errors import make_error
 
 
+@lru_cache(maxsize=256)
+def _compiled_validator(schema_key: str) -> Any:
+    schema = json.loads(schema_key)
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    return validator_cls(schema)
+
+
+def _schema_validator(schema: dict[str, Any]) -> Any:
+    # Schemas are re-validated for every candidate and retry; compile each one once.
+    try:
+        schema_key = json.dumps(schema, sort_keys=True, ensure_ascii=True)
+    except (TypeError, ValueError):
+        validator_cls = jsonschema.validators.validator_for(schema)
+        validator_cls.check_schema(schema)
+        return validator_cls(schema)
+    return _compiled_validator(schema_key)
+
+
 def validate_json_schema_instance(
     *, instance: dict[str, Any], schema: dict[str, Any], phase: str
 ) -> None:
-    try:
-        jsonschema.validate(instance=instance, schema=schema)
-    except jsonschema.ValidationError as exc:
+    exc = jsonschema.exceptions.best_match(_schema_validator(schema).iter_errors(instance))
+    if exc is not None:
         error_code = "RLLM_004" if phase == "input" else "RLLM_005"
         error_type = "InputSchemaError" if phase == "input" else "OutputSchemaError"
         raise make_error(
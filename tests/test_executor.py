@@ -122,3 +122,64 @@ def test_non_string_provider_content_raises_execution_error(tmp_path: Path, monk
         run_program(app, {"text": "abc"}, RunOptions(max_retries=0), completion_fn=fake)
 
     assert exc.value.payload.error_code == "RLLM_011"
+
+
+def _write_ollama_compose_tree(tmp_path: Path) -> Path:
+    models = {
+        "compose_summary_keywords.rllm": "ollama/qwen2.5",
+        "summary.rllm": "ollama/llama3.1",
+        "extract_keywords.rllm": "ollama/qwen2.5",
+    }
+    for name, model in models.items():
+        text = Path("examples", name).read_text(encoding="utf-8")
+        (tmp_path / name).write_text(text.replace("openai/gpt-4o-mini", model), encoding="utf-8")
+    return tmp_path / "compose_summary_keywords.rllm"
+
+
+def test_uses_tree_checks_distinct_ollama_models_once(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    app = _write_ollama_compose_tree(tmp_path)
+    batches: list[tuple[list[str], bool]] = []
+    singles: list[str] = []
+    monkeypatch.setattr(
+        "runllm.executor.ensure_ollama_models",
+        lambda models, auto_pull: batches.append((list(models), auto_pull)),
+    )
+    monkeypatch.setattr(
+        "runllm.executor.ensure_ollama_model",
+        lambda model, auto_pull: singles.append(model),
+    )
+    fake = FakeCompletion(
+        [
+            '{"summary":"small"}',
+            '{"keywords":["a","b"]}',
+            '{"summary":"small","keywords":["a","b"]}',
+        ]
+    )
+
+    run_program(
+        app,
+        {"text": "abc"},
+        RunOptions(max_retries=0, ollama_auto_pull=False),
+        completion_fn=fake,
+    )
+
+    assert batches == [(["qwen2.5", "llama3.1"], False)]
+    assert sorted(singles) == ["llama3.1", "qwen2.5", "qwen2.5"]
+
+
+def test_uses_tree_validates_input_before_checking_ollama_models(tmp_path: Path, monkeypatch) -> None:
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    app = _write_ollama_compose_tree(tmp_path)
+    batches: list[list[str]] = []
+    monkeypatch.setattr(
+        "runllm.executor.ensure_ollama_models",
+        lambda models, auto_pull: batches.append(list(models)),
+    )
+
+    with pytest.raises(RunLLMError) as exc:
+        run_program(app, {"text": 1}, RunOptions(ollama_auto_pull=True), completion_fn=FakeCompletion([]))
+
+    assert exc.value.payload.error_code == "RLLM_004"
+    assert batches == []
@@ -1,31 +1,227 @@
 from __future__ import annotations
 
+import io
+import json
+import sys
+import threading
+import urllib.error
+from pathlib import Path
 from types import SimpleNamespace
 
 import pytest
 
 from runllm.errors import RunLLMError
-from runllm.ollama import ensure_ollama_model, ollama_has_model
+from runllm.ollama import (
+    _ollama_binary,
+    _pull_model_http,
+    _show_model_http,
+    ensure_ollama_model,
+    ensure_ollama_models,
+    ollama_has_model,
+    reset_ollama_model_cache_for_tests,
+)
+
+
+@pytest.fixture(autouse=True)
+def _reset_model_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Never probe a real local Ollama; tests opt back in to the /api/show path explicitly.
+    monkeypatch.setattr("runllm.ollama._show_model_http", lambda _model: None)
+    reset_ollama_model_cache_for_tests()
+
+
+class _FakeResponse:
+    def __init__(self, body: bytes) -> None:
+        self._body = body
+
+    def read(self) -> bytes:
+        return self._body
+
+    def __iter__(self):
+        return iter(self._body.splitlines(keepends=True))
+
+    def __enter__(self) -> "_FakeResponse":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        return None
+
+
+def test_ollama_has_model_uses_http_tags(monkeypatch: pytest.MonkeyPatch) -> None:
+    requested: list[str] = []
+
+    def _fake_urlopen(url, timeout):
+        requested.append(url)
+        return _FakeResponse(json.dumps({"models": [{"name": "llama3.1:8b"}]}).encode("utf-8"))
+
+    def _should_not_run(_cmd, **_kwargs):
+        raise AssertionError("ollama CLI should not be used when the API answers")
+
+    monkeypatch.setenv("OLLAMA_API_BASE", "http://ollama.test:11434/")
+    monkeypatch.setattr("urllib.request.urlopen", _fake_urlopen)
+    monkeypatch.setattr("runllm.ollama._run_ollama", _should_not_run)
+
+    assert ollama_has_model("llama3.1:8b") is True
+    assert ollama_has_model("qwen2.5:7b") is False
+    assert requested[0] == "http://ollama.test:11434/api/tags"
+
+
+def test_ollama_has_model_probes_single_model_via_show(monkeypatch: pytest.MonkeyPatch) -> None:
+    shown: list[dict] = []
+
+    def _fake_urlopen(request, timeout):
+        assert request.full_url == "http://localhost:11434/api/show"
+        payload = json.loads(request.data)
+        shown.append(payload)
+        if payload["name"] == "llama3.1:latest":
+            return _FakeResponse(b"{}")
+        raise urllib.error.HTTPError(request.full_url, 404, "Not Found", {}, io.BytesIO(b""))
+
+    def _should_not_list():
+        raise AssertionError("a single-model check should not fetch the full model list")
+
+    monkeypatch.delenv("OLLAMA_API_BASE", raising=False)
+    monkeypatch.setattr("runllm.ollama._show_model_http", _show_model_http)
+    monkeypatch.setattr("urllib.request.urlopen", _fake_urlopen)
+    monkeypatch.setattr("runllm.ollama._list_models_http", _should_not_list)
+
+    assert ollama_has_model("llama3.1") is True
+    assert ollama_has_model("qwen2.5:7b") is False
+    assert shown == [{"name": "llama3.1:latest"}, {"name": "qwen2.5:7b"}]
+
+
+def test_ollama_has_model_falls_back_when_api_base_is_malformed(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("OLLAMA_API_BASE", "ollama.internal")
+    monkeypatch.setattr("runllm.ollama._show_model_http", _show_model_http)
+    monkeypatch.setattr(
+        "runllm.ollama._run_ollama",
+        lambda _cmd, **_kwargs: SimpleNamespace(returncode=0, stdout=b"llama3.1:8b 1GB\n", stderr=b""),
+    )
+
+    assert _show_model_http("llama3.1:8b") is None
+    assert ollama_has_model("llama3.1:8b") is True
 
 
 def test_ollama_has_model_true(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: None)
     monkeypatch.setattr(
         "runllm.ollama._run_ollama",
-        lambda _cmd: SimpleNamespace(returncode=0, stdout="llama3.1:8b 1GB\n", stderr=""),
+        lambda _cmd, **_kwargs: SimpleNamespace(returncode=0, stdout=b"llama3.1:8b 1GB\n", stderr=b""),
     )
 
     assert ollama_has_model("llama3.1:8b") is True
 
 
+def test_ollama_has_model_parses_cli_table(monkeypatch: pytest.MonkeyPatch) -> None:
+    table = (
+        b"NAME              ID              SIZE      MODIFIED\n"
+        b"llama3.1:8b       42182419e950    4.7 GB    2 days ago\n"
+        b"\n"
+        b"qwen2.5:7b        845dbda0ea48    4.7 GB    3 weeks ago\n"
+    )
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: None)
+    monkeypatch.setattr(
+        "runllm.ollama._run_ollama",
+        lambda _cmd, **_kwargs: SimpleNamespace(returncode=0, stdout=table, stderr=b""),
+    )
+
+    assert ollama_has_model("qwen2.5:7b") is True
+    assert ollama_has_model("NAME") is False
+
+
+def test_ollama_has_model_matches_implicit_latest_tag(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: {"llama3:latest", "registry.local:5000/team/coder"})
+
+    assert ollama_has_model("llama3") is True
+    assert ollama_has_model("llama3:latest") is True
+    assert ollama_has_model("llama3:70b") is False
+    assert ollama_has_model("registry.local:5000/team/coder:latest") is True
+
+
 def test_ollama_has_model_false_on_failed_list(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: None)
     monkeypatch.setattr(
         "runllm.ollama._run_ollama",
-        lambda _cmd: SimpleNamespace(returncode=1, stdout="", stderr="failed"),
+        lambda _cmd, **_kwargs: SimpleNamespace(returncode=1, stdout=b"", stderr=b"failed"),
     )
 
     assert ollama_has_model("llama3.1:8b") is False
 
 
+def test_ollama_has_model_caches_model_list(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls = {"count": 0}
+
+    def _fake_list() -> set[str]:
+        calls["count"] += 1
+        return {"llama3.1:8b"}
+
+    monkeypatch.setattr("runllm.ollama._list_models_http", _fake_list)
+
+    assert ollama_has_model("llama3.1:8b") is True
+    assert ollama_has_model("qwen2.5:7b") is False
+    assert calls["count"] == 1
+
+
+def test_ollama_has_model_caches_positive_show_answers(monkeypatch: pytest.MonkeyPatch) -> None:
+    probed: list[str] = []
+    answers = {"llama3.1:8b": True, "qwen2.5:7b": False}
+
+    def _fake_show(model: str) -> bool:
+        probed.append(model)
+        return answers[model]
+
+    monkeypatch.setattr("runllm.ollama._show_model_http", _fake_show)
+
+    assert ollama_has_model("llama3.1:8b") is True
+    assert ollama_has_model("llama3.1:8b") is True
+    assert ollama_has_model("qwen2.5:7b") is False
+    assert ollama_has_model("qwen2.5:7b") is False
+    assert probed == ["llama3.1:8b", "qwen2.5:7b", "qwen2.5:7b"]
+
+    reset_ollama_model_cache_for_tests()
+    assert ollama_has_model("llama3.1:8b") is True
+    assert probed[-1] == "llama3.1:8b"
+
+
+def test_ollama_has_model_skips_show_when_listing_is_fresh(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: {"llama3.1:8b", "qwen2.5:7b"})
+    ensure_ollama_models(["llama3.1:8b", "qwen2.5:7b"], auto_pull=False)
+
+    def _unexpected_show(_model: str) -> bool:
+        raise AssertionError("fresh listing should answer without /api/show")
+
+    monkeypatch.setattr("runllm.ollama._show_model_http", _unexpected_show)
+    assert ollama_has_model("qwen2.5:7b") is True
+
+
+def test_ollama_has_model_serves_stale_list_when_unreachable(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: {"llama3.1:8b"})
+    assert ollama_has_model("llama3.1:8b") is True
+
+    monkeypatch.setattr("runllm.ollama._MODEL_CACHE_TTL_SECONDS", 0.0)
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: None)
+    monkeypatch.setattr(
+        "runllm.ollama._run_ollama",
+        lambda _cmd, **_kwargs: SimpleNamespace(returncode=1, stdout=b"", stderr=b"failed"),
+    )
+    assert ollama_has_model("llama3.1:8b") is True
+
+
+def test_missing_ollama_binary_reports_model_missing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("shutil.which", lambda _name: None)
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: None)
+    monkeypatch.setattr("runllm.ollama._pull_model_http", lambda _model: None)
+    _ollama_binary.cache_clear()
+    try:
+        assert ollama_has_model("llama3.1:8b") is False
+        with pytest.raises(RunLLMError) as exc:
+            ensure_ollama_model("llama3.1:8b", auto_pull=True)
+    finally:
+        _ollama_binary.cache_clear()
+
+    assert exc.value.payload.error_code == "RLLM_010"
+    assert "not found" in exc.value.payload.details["stderr"]
+
+
 def test_ensure_ollama_model_missing_without_auto_pull_raises(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr("runllm.ollama.ollama_has_model", lambda _model: False)
 
@@ -37,9 +233,10 @@ def test_ensure_ollama_model_missing_without_auto_pull_raises(monkeypatch: pytes
 
 def test_ensure_ollama_model_pull_failure_raises(monkeypatch: pytest.MonkeyPatch) -> None:
     monkeypatch.setattr("runllm.ollama.ollama_has_model", lambda _model: False)
+    monkeypatch.setattr("runllm.ollama._pull_model_http", lambda _model: None)
     monkeypatch.setattr(
         "runllm.ollama._run_ollama",
-        lambda _cmd: SimpleNamespace(returncode=1, stdout="", stderr="pull failed"),
+        lambda _cmd, **_kwargs: SimpleNamespace(returncode=1, stdout=b"", stderr=b"pull failed"),
     )
 
     with pytest.raises(RunLLMError) as exc:
@@ -49,14 +246,149 @@ def test_ensure_ollama_model_pull_failure_raises(monkeypatch: pytest.MonkeyPatch
     assert "pull failed" in exc.value.payload.details["stderr"]
 
 
+def test_cli_pull_keeps_error_lines_from_stderr_tail(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    fake_ollama = tmp_path / "ollama"
+    fake_ollama.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "sys.stdout.write('x' * 200_000)\n"
+        "for pct in range(2000):\n"
+        "    sys.stderr.write(f'\\rpulling manifest {pct}%')\n"
+        "sys.stderr.write('\\nError: pull model manifest: file does not exist\\n')\n"
+        "sys.stderr.write('check the model name at https://ollama.com/library\\n')\n"
+        "sys.exit(1)\n",
+        encoding="utf-8",
+    )
+    fake_ollama.chmod(0o755)
+    monkeypatch.setattr("runllm.ollama._ollama_binary", lambda: str(fake_ollama))
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: set())
+    monkeypatch.setattr("runllm.ollama._pull_model_http", lambda _model: None)
+
+    with pytest.raises(RunLLMError) as exc:
+        ensure_ollama_model("missing:model", auto_pull=True)
+
+    assert exc.value.payload.details["stderr"] == (
+        "Error: pull model manifest: file does not exist\n"
+        "check the model name at https://ollama.com/library"
+    )
+
+
+def test_pull_falls_back_to_cli_when_api_base_is_malformed(monkeypatch: pytest.MonkeyPatch) -> None:
+    pulled: list[list[str]] = []
+
+    def _fake_run(cmd, **_kwargs):
+        pulled.append(cmd)
+        return SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+
+    monkeypatch.setenv("OLLAMA_API_BASE", "ollama.internal")
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: set())
+    monkeypatch.setattr("runllm.ollama._run_ollama", _fake_run)
+
+    assert _pull_model_http("llama3.1:8b") is None
+    ensure_ollama_model("llama3.1:8b", auto_pull=True)
+
+    assert ["ollama", "pull", "llama3.1:8b"] in pulled
+
+
+def test_ensure_ollama_model_pulls_via_http_stream(monkeypatch: pytest.MonkeyPatch) -> None:
+    sent: list[dict] = []
+    stream = b'{"status":"pulling manifest"}\n{"status":"downloading","completed":1}\n{"status":"success"}\n'
+
+    def _fake_urlopen(request, timeout):
+        sent.append(json.loads(request.data))
+        return _FakeResponse(stream)
+
+    def _should_not_run(_cmd, **_kwargs):
+        raise AssertionError("ollama CLI should not be used when the API answers")
+
+    monkeypatch.setattr("runllm.ollama.ollama_has_model", lambda _model: False)
+    monkeypatch.setattr("urllib.request.urlopen", _fake_urlopen)
+    monkeypatch.setattr("runllm.ollama._run_ollama", _should_not_run)
+
+    ensure_ollama_model("llama3.1:8b", auto_pull=True)
+
+    assert sent == [{"name": "llama3.1:8b", "stream": True}]
+
+
+def test_ensure_ollama_model_http_stream_error_raises(monkeypatch: pytest.MonkeyPatch) -> None:
+    stream = b'{"status":"pulling manifest"}\n{"error":"pull model manifest: file does not exist"}\n'
+    monkeypatch.setattr("runllm.ollama.ollama_has_model", lambda _model: False)
+    monkeypatch.setattr("urllib.request.urlopen", lambda _request, timeout: _FakeResponse(stream))
+
+    with pytest.raises(RunLLMError) as exc:
+        ensure_ollama_model("missing:model", auto_pull=True)
+
+    assert exc.value.payload.error_code == "RLLM_010"
+    assert "file does not exist" in exc.value.payload.details["stderr"]
+
+
 def test_ensure_ollama_model_skips_pull_when_present(monkeypatch: pytest.MonkeyPatch) -> None:
     called = {"pull": False}
     monkeypatch.setattr("runllm.ollama.ollama_has_model", lambda _model: True)
 
-    def _should_not_run(_cmd):
+    def _should_not_run(_cmd, **_kwargs):
         called["pull"] = True
-        return SimpleNamespace(returncode=0, stdout="", stderr="")
+        return SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
 
     monkeypatch.setattr("runllm.ollama._run_ollama", _should_not_run)
     ensure_ollama_model("llama3.1:8b", auto_pull=True)
     assert called["pull"] is False
+
+
+def test_ensure_ollama_models_lists_once_and_pulls_only_missing(monkeypatch: pytest.MonkeyPatch) -> None:
+    listed = {"count": 0}
+    pulled: list[str] = []
+
+    def _fake_list() -> set[str]:
+        listed["count"] += 1
+        return {"llama3.1:8b"}
+
+    def _fake_run(cmd, **_kwargs):
+        pulled.append(cmd[-1])
+        return SimpleNamespace(returncode=0, stdout=b"", stderr=b"")
+
+    monkeypatch.setattr("runllm.ollama._list_models_http", _fake_list)
+    monkeypatch.setattr("runllm.ollama._pull_model_http", lambda _model: None)
+    monkeypatch.setattr("runllm.ollama._run_ollama", _fake_run)
+
+    ensure_ollama_models(["llama3.1:8b", "qwen2.5:7b", "qwen2.5:7b"], auto_pull=True)
+
+    assert listed["count"] == 1
+    assert pulled == ["qwen2.5:7b"]
+
+
+def test_ensure_ollama_models_pulls_concurrently_up_to_limit(monkeypatch: pytest.MonkeyPatch) -> None:
+    active = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+    both_started = threading.Barrier(2, timeout=5)
+
+    def _fake_pull(_model: str) -> str:
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        try:
+            both_started.wait()
+            both_started.abort()  # later pulls should not wait for a partner
+        except threading.BrokenBarrierError:
+            pass
+        with lock:
+            active["now"] -= 1
+        return ""
+
+    monkeypatch.setenv("OLLAMA_NUM_PARALLEL", "2")
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: set())
+    monkeypatch.setattr("runllm.ollama._pull_model_http", _fake_pull)
+
+    ensure_ollama_models(["a:1", "b:1", "c:1"], auto_pull=True)
+
+    assert active["peak"] == 2
+
+
+def test_ensure_ollama_models_reports_all_missing(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr("runllm.ollama._list_models_http", lambda: {"llama3.1:8b"})
+
+    with pytest.raises(RunLLMError) as exc:
+        ensure_ollama_models(["qwen2.5:7b", "llama3.1:8b", "mistral:7b"], auto_pull=False)
+
+    assert exc.value.payload.error_code == "RLLM_010"
+    assert exc.value.payload.details["models"] == ["qwen2.5:7b", "mistral:7b"]
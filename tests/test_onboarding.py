@@ -1,13 +1,21 @@
 from __future__ import annotations
 
 import json
+import threading
 from pathlib import Path
 from typing import Any
 
+import pytest
+
 from runllm.cli import main
 from runllm.config import reset_runtime_config_for_tests
 from runllm.errors import make_error
-from runllm.onboarding import _onboarding_app_path
+from runllm.onboarding import (
+    _is_usable_prompt,
+    _onboarding_app_path,
+    _packaged_onboarding_app,
+    _upsert_env_file,
+)
 
 
 def _set_input_responses(monkeypatch, responses: list[str]) -> None:
@@ -375,6 +383,110 @@ def test_onboard_credential_guidance_fallback_has_setup_step(tmp_path, monkeypat
     assert len(guidance["setup_steps"]) >= 1
 
 
+@pytest.mark.parametrize(
+    "concurrent_steps",
+    [
+        {"provider_select", "credential_check", "hello_test"},
+        {"input_schema_builder", "output_schema_builder", "prompt_builder", "recovery_builder"},
+    ],
+    ids=["setup_steps", "draft_builders"],
+)
+def test_onboarding_runs_independent_steps_concurrently(
+    tmp_path, monkeypatch, capsys, concurrent_steps: set[str]
+) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    reset_runtime_config_for_tests()
+
+    _set_input_responses(
+        monkeypatch,
+        [
+            "summarize support tickets",
+            "parallel_app",
+            "parallel description",
+            "tester",
+            "text",
+            "summary",
+            "8000",
+            "0",
+            "",
+            "",
+            str(tmp_path / "parallel_app.rllm"),
+            "",
+        ],
+    )
+    all_started = threading.Barrier(len(concurrent_steps), timeout=5)
+
+    def fake_run_program(program_path, input_payload, options, **kwargs):
+        if Path(program_path).stem in concurrent_steps:
+            all_started.wait()  # raises BrokenBarrierError if the steps ran one at a time
+        return {"summary": "ok", "message": "hello", "ok": True}
+
+    monkeypatch.setattr("runllm.onboarding.run_program", fake_run_program)
+
+    code = main(["onboard", "--model", "openai/gpt-4o-mini"])
+
+    assert code == 0
+    captured = capsys.readouterr()
+    assert "Hello check: hello" in captured.err
+    assert _parse_json_payload(captured.out)["ok"] is True
+
+
+def test_upsert_env_file_appends_new_key_and_replaces_existing(tmp_path) -> None:
+    env_path = tmp_path / "nested" / ".env"
+
+    _upsert_env_file(env_path, "OPENAI_API_KEY", "first")
+    env_path.write_text(env_path.read_text(encoding="utf-8") + "# keep me\nOTHER=1", encoding="utf-8")
+    _upsert_env_file(env_path, "MISTRAL_API_KEY", "second")
+    assert env_path.read_text(encoding="utf-8") == (
+        'OPENAI_API_KEY="first"\n# keep me\nOTHER=1\nMISTRAL_API_KEY="second"\n'
+    )
+
+    _upsert_env_file(env_path, "OPENAI_API_KEY", "rotated")
+    assert env_path.read_text(encoding="utf-8") == (
+        'OPENAI_API_KEY="rotated"\n# keep me\nOTHER=1\nMISTRAL_API_KEY="second"\n'
+    )
+
+
+def test_is_usable_prompt_requires_json_and_whole_output_keys() -> None:
+    assert _is_usable_prompt("Return ONLY a JSON object with keys: summary, sentiment.", ["summary", "sentiment"])
+    assert not _is_usable_prompt("Return keys summary and sentiment.", ["summary", "sentiment"])
+    assert not _is_usable_prompt("Return JSON with a results list.", ["result"])
+
+
+def test_onboard_stops_when_hello_test_connectivity_check_fails(tmp_path, monkeypatch, capsys) -> None:
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    reset_runtime_config_for_tests()
+    _set_input_responses(monkeypatch, [])
+    ran: list[str] = []
+
+    def fake_run_program(program_path, input_payload, options, **kwargs):
+        ran.append(Path(program_path).stem)
+        if Path(program_path).stem == "hello_test":
+            raise make_error(
+                error_code="RLLM_014",
+                error_type="MissingProviderCredentialError",
+                message="simulated auth failure",
+                details={},
+                recovery_hint="fix credential",
+                doc_ref="docs/errors.md#RLLM_014",
+            )
+        return {"summary": "ok"}
+
+    monkeypatch.setattr("runllm.onboarding.run_program", fake_run_program)
+
+    code = main(["onboard", "--model", "openai/gpt-4o-mini"])
+    out = capsys.readouterr().out
+
+    assert code == 1
+    assert '"error_code": "RLLM_014"' in out
+    assert "hello_test" in ran
+    assert "app_goal_capture" not in ran  # onboarding stopped at the failed check
+
+
 def test_onboarding_app_path_ignores_cwd_examples(tmp_path, monkeypatch) -> None:
     monkeypatch.chdir(tmp_path)
     fake = tmp_path / "examples" / "onboarding" / "app_goal_capture.rllm"
@@ -387,6 +499,20 @@ def test_onboarding_app_path_ignores_cwd_examples(tmp_path, monkeypatch) -> None
     assert selected.name == "app_goal_capture.rllm"
 
 
+def test_onboarding_app_path_writes_embedded_template_once(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr("runllm.onboarding._PACKAGED_ONBOARDING_DIR", tmp_path / "missing")
+    _packaged_onboarding_app.cache_clear()
+    try:
+        first = _onboarding_app_path("hello_test", tmp_path)
+        first.write_text("sentinel", encoding="utf-8")
+        second = _onboarding_app_path("hello_test", tmp_path)
+    finally:
+        _packaged_onboarding_app.cache_clear()
+
+    assert first == second == tmp_path / "hello_test.rllm"
+    assert second.read_text(encoding="utf-8") == "sentinel"
+
+
 def test_onboard_scaffold_file_override(tmp_path, monkeypatch, capsys) -> None:
     monkeypatch.chdir(tmp_path)
     monkeypatch.setenv("XDG_CONFIG_HOME", str(tmp_path / "config"))
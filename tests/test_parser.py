@@ -247,3 +247,22 @@ def test_parse_runllm_compat_accepts_devrelease_runtime(tmp_path: Path, monkeypa
     program = parse_rllm_file(app)
 
     assert program.name == "compat_app"
+
+
+def test_parse_reuses_cached_frontmatter_without_sharing_state(monkeypatch: pytest.MonkeyPatch) -> None:
+    loads: list[str] = []
+    real_load = parser_module.yaml.load
+
+    def _counting_load(stream, Loader):
+        loads.append(stream)
+        return real_load(stream, Loader=Loader)
+
+    parser_module._load_frontmatter.cache_clear()
+    monkeypatch.setattr(parser_module.yaml, "load", _counting_load)
+
+    first = parse_rllm_file("examples/summary.rllm")
+    first.llm_params["temperature"] = 99
+    second = parse_rllm_file("examples/summary.rllm")
+
+    assert len(loads) == 1
+    assert second.llm_params.get("temperature") != 99
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import jsonschema
 import pytest
 
 from runllm.errors import RunLLMError
 from runllm.validation import (
+    _schema_validator,
     extract_json_object_candidates,
     parse_model_json_payload,
     validate_json_schema_instance,
@@ -45,6 +47,18 @@ def test_validate_json_schema_instance_output_error_code() -> None:
     assert exc.value.payload.error_type == "OutputSchemaError"
 
 
+def test_schema_validator_is_reused_for_equal_schemas() -> None:
+    first = _schema_validator({"type": "object", "required": ["a"]})
+    second = _schema_validator({"required": ["a"], "type": "object"})
+
+    assert first is second
+
+
+def test_validate_json_schema_instance_rejects_invalid_schema() -> None:
+    with pytest.raises(jsonschema.SchemaError):
+        validate_json_schema_instance(instance={}, schema={"type": 12}, phase="input")
+
+
 def test_parse_model_json_payload_invalid_json_raises() -> None:
     with pytest.raises(RunLLMError) as exc:
         parse_model_json_payload("this is not json")